@@ -0,0 +1,334 @@
+import json
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from selenium.common.exceptions import NoSuchElementException, SessionNotCreatedException, TimeoutException
+
+log = logging.getLogger(__name__)
+
+BROWSER_POOL_BASE_PORT = 9222
+BROWSER_POOL_RECYCLE_AFTER = 100
+BROWSER_STARTUP_TIMEOUT = 15
+# Stylesheets, fonts, images and trackers; the chat composer is built by script alone.
+BLOCKED_URL_PATTERNS = [
+    "*.css", "*.woff", "*.woff2", "*.ttf",
+    "*.png", "*.jpg", "*.jpeg", "*.webp", "*.gif",
+    "*googletag*", "*doubleclick*", "*analytics*",
+]
+DRIVER_PATH_CACHE = os.path.join(os.path.expanduser('~'), '.whatbulk_driver_path')
+
+CHROME_CANDIDATES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+]
+
+
+def find_chrome_binary():
+    """Locate a Chrome executable, honouring the CHROME_BINARY environment variable."""
+    override = os.environ.get("CHROME_BINARY")
+    if override:
+        return override
+    for candidate in CHROME_CANDIDATES:
+        path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+        if path:
+            return path
+    raise FileNotFoundError("Chrome executable not found. Set CHROME_BINARY to its path.")
+
+
+def driver_runs(path):
+    """True when path is a chromedriver that still starts and reports its version."""
+    try:
+        return subprocess.run([path, '--version'], stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, timeout=5).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def chromedriver_path(refresh=False):
+    """Return the chromedriver executable, only asking webdriver_manager (and its
+    version check over the network) when the cached path no longer runs or
+    refresh is requested."""
+    if not refresh:
+        try:
+            with open(DRIVER_PATH_CACHE, 'r', encoding='utf-8') as f:
+                cached = f.read().strip()
+        except OSError:
+            cached = ''
+        if cached and driver_runs(cached):
+            return cached
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    path = ChromeDriverManager().install()
+    with open(DRIVER_PATH_CACHE, 'w', encoding='utf-8') as f:
+        f.write(path)
+    return path
+
+
+def start_chrome(chrome_options, refresh_driver=False):
+    """Start a Chrome WebDriver session using the cached chromedriver."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    try:
+        return webdriver.Chrome(service=Service(chromedriver_path(refresh_driver)), options=chrome_options)
+    except SessionNotCreatedException:
+        if refresh_driver:
+            raise
+        # Chrome was updated past the cached driver; resolve a matching one and retry.
+        log.info("Cached chromedriver rejected by Chrome; refreshing it.")
+        return webdriver.Chrome(service=Service(chromedriver_path(refresh=True)), options=chrome_options)
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Stop the current tab from downloading the resources matching patterns.
+    Blocking is per tab, so call this again after switching to a new one."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+class BrowserPool:
+    """Keeps Chrome instances running with a remote debugging port so Selenium can
+    attach to an already warm browser instead of launching one per run.
+
+    Slot 0 uses profile_root itself so an existing WhatsApp login is reused; every
+    further slot gets its own profile (and therefore needs its own QR scan).
+    Browsers are left running when the script exits and are recycled after
+    recycle_after sessions have attached to them.
+    """
+
+    def __init__(self,
+                 size=1,
+                 base_port=BROWSER_POOL_BASE_PORT,
+                 profile_root='./chrome_profile',
+                 recycle_after=BROWSER_POOL_RECYCLE_AFTER,
+                 chrome_binary=None):
+        self.size = size
+        self.ports = [base_port + i for i in range(size)]
+        self.profile_root = os.path.abspath(profile_root)
+        self.recycle_after = recycle_after
+        self.chrome_binary = chrome_binary
+        self.state_file = os.path.join(os.path.dirname(self.profile_root), 'browser_pool.json')
+        self.state = self.load_state()
+        self.next_slot = 0
+        # Pids launched by this process, which are known to be ours without /proc.
+        self.launched_pids = set()
+
+    def load_state(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_state(self):
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def profile_dir(self, port):
+        slot = self.ports.index(port)
+        return self.profile_root if slot == 0 else f"{self.profile_root}_{slot}"
+
+    def is_alive(self, port):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/version", timeout=0.5):
+                return True
+        except OSError:
+            return False
+
+    def launch(self, port):
+        profile_dir = self.profile_dir(port)
+        os.makedirs(profile_dir, exist_ok=True)
+        if self.chrome_binary is None:
+            self.chrome_binary = find_chrome_binary()
+        args = [self.chrome_binary,
+                f"--remote-debugging-port={port}",
+                f"--user-data-dir={profile_dir}",
+                "--no-first-run",
+                "--no-default-browser-check",
+                "about:blank"]
+        # Detach so the browser outlives this script and stays warm for the next run.
+        if sys.platform == 'win32':
+            detach = {'creationflags': subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            detach = {'start_new_session': True}
+        process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **detach)
+
+        deadline = time.monotonic() + BROWSER_STARTUP_TIMEOUT
+        while not self.is_alive(port):
+            if time.monotonic() >= deadline:
+                process.kill()
+                raise TimeoutError(f"Chrome did not open debugging port {port} in time.")
+            time.sleep(0.2)
+        self.launched_pids.add(process.pid)
+        self.state[str(port)] = {'pid': process.pid, 'uses': 0}
+        self.save_state()
+        log.info("Launched pooled Chrome on port %s (pid %s).", port, process.pid)
+        print(f"Launched Chrome on debugging port {port}.")
+
+    def owns_port(self, pid, port):
+        """True when pid is a browser this pool launched on port. After a reboot or a
+        crash the recorded pid may belong to an unrelated process; its command line
+        tells them apart. Without /proc only pids launched by this process count."""
+        if pid in self.launched_pids:
+            return True
+        try:
+            with open(f"/proc/{pid}/cmdline", 'rb') as f:
+                args = f.read().split(b'\0')
+        except OSError:
+            return False
+        return f"--remote-debugging-port={port}".encode() in args
+
+    def kill(self, port):
+        """Stop the pooled browser on port and forget it. Only a live browser whose
+        recorded pid still owns the port is signalled."""
+        entry = self.state.pop(str(port), None)
+        self.save_state()
+        if not entry or not entry.get('pid') or not self.is_alive(port):
+            return
+        if not self.owns_port(entry['pid'], port):
+            log.warning("Not stopping pid %s: it is not the browser on port %s.", entry['pid'], port)
+            return
+        try:
+            os.kill(entry['pid'], signal.SIGTERM)
+        except OSError:
+            pass
+        deadline = time.monotonic() + BROWSER_STARTUP_TIMEOUT
+        while self.is_alive(port) and time.monotonic() < deadline:
+            time.sleep(0.2)
+        log.info("Stopped pooled Chrome on port %s.", port)
+
+    def warm(self):
+        """Start every pool member that is not already running."""
+        for port in self.ports:
+            if not self.is_alive(port):
+                self.launch(port)
+
+    def acquire(self):
+        """Return a debugger address for the next pool member, launching or
+        recycling its browser as needed."""
+        port = self.ports[self.next_slot]
+        self.next_slot = (self.next_slot + 1) % self.size
+
+        entry = self.state.get(str(port))
+        if not self.is_alive(port):
+            # The recorded browser is gone (crash, reboot); its pid may since have
+            # been reused, so drop the entry without signalling anything.
+            if entry:
+                del self.state[str(port)]
+            self.launch(port)
+        elif entry and entry['uses'] >= self.recycle_after:
+            print(f"Recycling Chrome on port {port} after {entry['uses']} sessions.")
+            self.kill(port)
+            if not self.is_alive(port):
+                self.launch(port)
+
+        entry = self.state.setdefault(str(port), {'pid': None, 'uses': 0})
+        entry['uses'] += 1
+        self.save_state()
+        return f"127.0.0.1:{port}"
+
+    def shutdown(self):
+        """Stop every pool member, e.g. before deleting the profiles."""
+        for port in self.ports:
+            self.kill(port)
+
+
+class TabPool:
+    """Runs independent jobs concurrently, each in its own tab of one browser.
+
+    A WebDriver session is not thread-safe, so every driver call goes through
+    `lock` after switching to the caller's tab; only the waits in between
+    (page loads, polling intervals) overlap across tabs.
+
+    WhatsApp Web allows one active tab per profile and may hand the session to
+    the most recently loaded tab, so parallel tabs are opt-in and should be
+    tried on an account that tolerates it first.
+    """
+
+    def __init__(self, driver, size, prepare_tab=None):
+        self.driver = driver
+        self.size = size
+        # Optional prepare_tab(driver), run in every new tab before it loads its
+        # URL, e.g. block_resources.
+        self.prepare_tab = prepare_tab
+        self.lock = threading.RLock()
+        # Chromedriver runs CDP commands against the current window, so the driver
+        # returns to this live tab whenever the tab it was on is closed.
+        self.home = driver.current_window_handle
+        self.current_handle = self.home
+
+    def open_tab(self, url='about:blank'):
+        """Open url in a new background tab and return its window handle. With
+        prepare_tab set, the tab starts blank and only navigates to url once it
+        has been prepared."""
+        with self.lock:
+            first_url = 'about:blank' if self.prepare_tab else url
+            target_id = self.driver.execute_cdp_cmd("Target.createTarget", {"url": first_url})['targetId']
+            # Chromedriver window handles are the CDP target ids (older builds add a prefix).
+            handle = next(h for h in self.driver.window_handles if h.endswith(target_id))
+            if self.prepare_tab:
+                with self.use(handle) as driver:
+                    self.prepare_tab(driver)
+                    if url != first_url:
+                        driver.execute_cdp_cmd("Page.navigate", {"url": url})
+            return handle
+
+    def close_tab(self, handle):
+        with self.lock:
+            self.driver.execute_cdp_cmd("Target.closeTarget", {"targetId": handle.removeprefix('CDwindow-')})
+            if self.current_handle == handle:
+                self.driver.switch_to.window(self.home)
+                self.current_handle = self.home
+
+    @contextmanager
+    def use(self, handle):
+        """Hold the driver with handle as the current window."""
+        with self.lock:
+            if self.current_handle != handle:
+                self.driver.switch_to.window(handle)
+                self.current_handle = handle
+            yield self.driver
+
+    def wait_until(self, handle, condition, timeout, poll_frequency=0.25):
+        """Lock-friendly WebDriverWait: evaluate condition(driver) in handle's tab,
+        releasing the driver to other tabs between attempts."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with self.use(handle) as driver:
+                    result = condition(driver)
+                if result:
+                    return result
+            except NoSuchElementException:
+                pass
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"Condition not met within {timeout} seconds.")
+            time.sleep(poll_frequency)
+
+    def map(self, job, items):
+        """Call job(item) for every item with at most `size` running at once and
+        return the results in input order."""
+        try:
+            with ThreadPoolExecutor(max_workers=self.size) as executor:
+                return list(executor.map(job, items))
+        finally:
+            with self.lock:
+                self.driver.switch_to.window(self.home)
+                self.current_handle = self.home
@@ -1,16 +1,88 @@
+import argparse
 import random
 import time
-import pandas as pd
-import urllib
+import csv
+import json
+import urllib.parse
 import os
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException, UnexpectedAlertPresentException
-from webdriver_manager.chrome import ChromeDriverManager
+import threading
+from contextlib import contextmanager
+# selenium.webdriver and webdriver_manager are imported where they are used, so
+# that --help and argument errors do not pay for loading them.
+from selenium.common.exceptions import TimeoutException, UnexpectedAlertPresentException, WebDriverException
+from browser_pool import BrowserPool, TabPool, block_resources, start_chrome
+
+WHATSAPP_URL = 'https://web.whatsapp.com'
+# Anti-ban pacing and the resume point survive restarts through this file.
+STATE_FILE = 'whatbulk_state.json'
+INVALID_NUMBER_TEXT = "Phone number shared via url is invalid."
+
+# Separators dropped from phone numbers, including the tabs and no-break spaces
+# that spreadsheet exports tend to leave in.
+_DROP_TABLE = str.maketrans('', '', ' -\t\r\n\u00a0')
+
+# Selectors defined once; CSS is matched by the browser's native selector engine.
+CHATS_SELECTOR = "div[title='Chats']"
+COMPOSER_SELECTOR = "footer div[contenteditable='true']"
+
+# True when the page text contains arguments[0]; one pass instead of an XPath text() scan.
+PAGE_HAS_TEXT_JS = "return document.body !== null && document.body.innerText.includes(arguments[0]);"
+
+# True once the chat composer (arguments[0]) or the text arguments[1] is on the page.
+CHAT_READY_JS = """
+return document.querySelector(arguments[0]) !== null
+    || (document.body !== null && document.body.innerText.includes(arguments[1]));
+"""
+
+# Send button candidates in priority order.
+SEND_BUTTON_SELECTORS = (
+    "button[aria-label='Send']",
+    "button[data-testid='compose-btn-send']",
+    "span[data-icon='send']",
+    "button[class*='send']",
+)
+
+# Returns the element for the first selector in arguments[0] that matches, or null.
+QUERY_SELECTOR_JS = """
+for (const selector of arguments[0]) {
+    const el = document.querySelector(selector);
+    if (el) return el;
+}
+return null;
+"""
+
+# Returns the first selector in arguments[1] that element arguments[0] matches, or null.
+MATCHING_SELECTOR_JS = "return arguments[1].find(s => arguments[0].matches(s)) || null;"
+
+# Async script timeout for the session; wait_for_selector polls in slices shorter than this.
+SCRIPT_TIMEOUT = 60
+
+# Resolves like QUERY_SELECTOR_JS as soon as any selector matches, or with null
+# after arguments[1] ms.
+WAIT_FOR_SELECTOR_JS = """
+const [selectors, timeout, done] = arguments;
+const deadline = Date.now() + timeout;
+const find = () => {
+    for (const selector of selectors) {
+        const el = document.querySelector(selector);
+        if (el) return el;
+    }
+    return null;
+};
+(function poll() {
+    const el = find();
+    if (el || Date.now() >= deadline) {
+        done(el);
+    } else {
+        setTimeout(poll, 100);
+    }
+})();
+"""
+
+logging.basicConfig(filename='whatsapp.log', level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger(__name__)
 
 def ensure_chrome_profile_dir(profile_dir):
     if not os.path.exists(profile_dir):
@@ -28,21 +100,51 @@ class Whatsapp:
                  message_file2='message2.txt',
                  short_delay_range=(0.5, 2),
                  long_break_range=(30, 60),
-                 message_threshold_range=(10, 15)):
+                 message_threshold_range=(10, 15),
+                 browser_pool=None,
+                 verbose=False,
+                 refresh_driver=False,
+                 block_resources=False):
+        # Per-contact progress chatter is only printed when verbose is set.
+        self.verbose = verbose
         self.message_count = 0
         self.short_delay_range = short_delay_range
         self.long_break_range = long_break_range
         self.message_threshold_range = message_threshold_range
         self.random_break_threshold = random.randint(*self.message_threshold_range)
+        self._base_url = f'{WHATSAPP_URL}/send?'
         self.message_templates = [
             self.load_message_template(message_file1),
             self.load_message_template(message_file2)
         ]
         self.driver = None
         self.is_driver_available = False
+        # When set, attach to a warm pooled Chrome instead of launching a new one.
+        self.browser_pool = browser_pool
+        # Re-resolve chromedriver through webdriver_manager instead of the cached path.
+        self.refresh_driver = refresh_driver
+        # Skip stylesheets, fonts, images and trackers in every tab that loads a chat.
+        self.block_resources = block_resources
+        # Set while process_contacts runs contacts in parallel tabs; each worker
+        # thread keeps the handle of its own tab in self._tab.
+        self.tab_pool = None
+        self._tab = threading.local()
+        self.pacing_lock = threading.Lock()
+        # Serial runs load every contact into these reusable tabs instead of opening
+        # new ones; a second tab is only used when pipelining.
+        self._work_handles = []
+        # The send button selector that matched last; tried alone before the full list.
+        self._send_button_selector = None
+        # Resume bookkeeping: contacts up to _last_index are done; _finished holds
+        # the ones completed out of order by parallel tabs.
+        self.state_lock = threading.Lock()
+        self._last_index = -1
+        self._finished = set()
+        self._contacts_mtime = None
+        # invalid_numbers.csv, written row by row so a crash cannot lose reported failures.
+        self._report_file = None
+        self._report_writer = None
         
-        logging.basicConfig(filename='whatsapp.log', level=logging.INFO,
-                            format='%(asctime)s - %(levelname)s - %(message)s')
         print("Whatsapp instance created.")
 
     def load_message_template(self, file_name):
@@ -53,12 +155,12 @@ class Whatsapp:
                 return template
         else:
             error_msg = f"Message file {file_name} not found. Using default message."
-            logging.error(error_msg)
+            log.error(error_msg)
             print(error_msg)
             return "Hello {first_name}, this is a default message."
 
     def format_phone_number(self, number):
-        number = str(number).strip().replace(" ", "")
+        number = str(number).translate(_DROP_TABLE)
         if number.startswith('+'):
             return number
         if number.startswith('0'):
@@ -76,213 +178,422 @@ class Whatsapp:
         return tokens[0]
 
     def open_whatsapp(self):
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         try:
-            profile_dir = os.path.abspath('./chrome_profile')
-            ensure_chrome_profile_dir(profile_dir)
-            
             chrome_options = webdriver.ChromeOptions()
-            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+            if self.browser_pool:
+                # Attached sessions reject most launch options, so only the address is set.
+                chrome_options.debugger_address = self.browser_pool.acquire()
+            else:
+                profile_dir = os.path.abspath('./chrome_profile')
+                ensure_chrome_profile_dir(profile_dir)
+                chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+                chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
             
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.get('https://web.whatsapp.com')
+            self.driver = start_chrome(chrome_options, refresh_driver=self.refresh_driver)
+            self.driver.set_script_timeout(SCRIPT_TIMEOUT)
+            if self.block_resources:
+                block_resources(self.driver)
+            # A warm pooled browser may already have WhatsApp Web loaded.
+            if not self.driver.current_url.startswith(WHATSAPP_URL):
+                self.driver.get(WHATSAPP_URL)
             self.is_driver_available = True
             print("WhatsApp Web opened. Please scan the QR code if required (or ensure you're already logged in).")
-            logging.info("WhatsApp Web opened. Waiting for chats to load.")
+            log.info("WhatsApp Web opened. Waiting for chats to load.")
             
             WebDriverWait(self.driver, 60).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@title='Chats']"))
+                EC.presence_of_element_located((By.CSS_SELECTOR, CHATS_SELECTOR))
             )
             print("Chats loaded successfully.")
-            logging.info("Chats are visible. Proceeding with messaging.")
+            log.info("Chats are visible. Proceeding with messaging.")
         except TimeoutException:
             error_msg = "Timeout: Chats did not load. Ensure you are logged in and have scanned the QR code."
-            logging.error(error_msg)
+            log.error(error_msg)
             print(error_msg)
             raise
         except Exception as e:
-            logging.error(f"Failed to open WhatsApp Web: {str(e)}")
+            log.error("Failed to open WhatsApp Web: %s", e)
             print(f"Error opening WhatsApp Web: {str(e)}")
             raise
 
+    @contextmanager
+    def focused(self):
+        """Yield the driver with this worker's tab as the current window."""
+        if self.tab_pool is None:
+            yield self.driver
+        else:
+            with self.tab_pool.use(self._tab.handle) as driver:
+                yield driver
+
+    def wait_until(self, condition, timeout):
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        if self.tab_pool is None:
+            return WebDriverWait(self.driver, timeout).until(condition)
+        return self.tab_pool.wait_until(self._tab.handle, condition, timeout)
+
     def randomized_delay(self):
         short_delay = random.uniform(*self.short_delay_range)
         time.sleep(short_delay)
         self.message_count += 1
         if self.message_count >= self.random_break_threshold:
             long_delay = random.randint(*self.long_break_range)
-            logging.info(f"Anti-ban: Taking a break for {long_delay} seconds after {self.message_count} messages.")
+            log.info("Anti-ban: Taking a break for %s seconds after %s messages.", long_delay, self.message_count)
             print(f"Taking a break for {long_delay} second(s) after {self.message_count} messages.")
             time.sleep(long_delay)
             self.message_count = 0
             self.random_break_threshold = random.randint(*self.message_threshold_range)
 
-    def find_send_button(self, wait_time=15):
+    def load_state(self, contacts_file):
+        """Restore the anti-ban counter from the previous run and return the index
+        of the first contact to process, which is past the saved resume point only
+        when contacts_file is unchanged since that run."""
+        self._contacts_mtime = os.path.getmtime(contacts_file)
         try:
-            print("Trying to find send button using aria-label='Send'...")
-            button = WebDriverWait(self.driver, wait_time).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[@aria-label='Send']"))
-            )
-            print("Send button found using aria-label.")
-            return button
-        except (TimeoutException, NoSuchElementException):
-            print("Send button not found with aria-label, trying alternative locators...")
-        alternative_xpaths = [
-            "//button[@data-testid='compose-btn-send']",
-            "//span[@data-icon='send']",
-            "//button[contains(@class, 'send')]"
-        ]
-        for xpath in alternative_xpaths:
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        self.message_count = state.get('count', 0)
+        self.random_break_threshold = state.get('threshold', self.random_break_threshold)
+        if state.get('csv_mtime') != self._contacts_mtime:
+            return 0
+        self._last_index = state.get('last_index', -1)
+        return self._last_index + 1
+
+    def save_state(self):
+        tmp_file = STATE_FILE + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'count': self.message_count,
+                       'threshold': self.random_break_threshold,
+                       'last_index': self._last_index,
+                       'csv_mtime': self._contacts_mtime}, f)
+        os.replace(tmp_file, STATE_FILE)
+
+    def open_report(self, file_name, append=False):
+        """Open the failure report; a resumed run appends to the report of the run
+        it continues, any other run starts a new one."""
+        self._report_file = open(file_name, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._report_writer = csv.writer(self._report_file)
+        if self._report_file.tell() == 0:
+            self._report_writer.writerow(['number', 'reason'])
+
+    def close_report(self):
+        if self._report_file is not None:
+            self._report_file.close()
+            self._report_file = self._report_writer = None
+
+    def checkpoint(self, index, number=None, reason=None):
+        """Mark the contact at index as done and save the state. A failure reason is
+        written to the report first, so a contact is never skipped on resume
+        without its row on disk. The resume point only moves past contacts whose
+        predecessors are all done as well."""
+        with self.state_lock:
+            if reason and self._report_writer is not None:
+                self._report_writer.writerow((number, reason))
+                self._report_file.flush()
+            self._finished.add(index)
+            while self._last_index + 1 in self._finished:
+                self._last_index += 1
+                self._finished.discard(self._last_index)
+            self.save_state()
+
+    def clear_checkpoint(self):
+        """Forget the resume point after a complete run; the pacing is kept."""
+        with self.state_lock:
+            self._last_index = -1
+            self._finished.clear()
+            self.save_state()
+
+    def wait_for_selector(self, selectors, timeout):
+        """Poll inside the page for the first of several CSS selectors to match,
+        using one script call instead of a WebDriverWait per selector."""
+        selectors = list(selectors)
+        if self.tab_pool is not None:
+            # An async poll would hold the shared driver; probe in short turns instead.
             try:
-                button = WebDriverWait(self.driver, wait_time).until(
-                    EC.element_to_be_clickable((By.XPATH, xpath))
-                )
-                print(f"Send button found using xpath: {xpath}")
+                return self.wait_until(lambda d: d.execute_script(QUERY_SELECTOR_JS, selectors), timeout)
+            except TimeoutException:
+                return None
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            element = self.driver.execute_async_script(
+                WAIT_FOR_SELECTOR_JS, selectors, int(min(remaining, SCRIPT_TIMEOUT - 1) * 1000))
+            if element is not None:
+                return element
+
+    def find_send_button(self, wait_time=15):
+        """Find the send button, trying the locator that matched for the previous
+        contact on its own before the full list; the layout is fixed per session."""
+        if self._send_button_selector is not None:
+            button = self.wait_for_selector([self._send_button_selector], 3)
+            if button is not None:
                 return button
-            except (TimeoutException, NoSuchElementException):
-                continue
-        warning_msg = "Warning: Send button not found using any locator."
-        logging.warning(warning_msg)
-        print(warning_msg)
-        return None
-
-    def open_contact_in_new_tab(self, number, message):
-        """Open a new tab for the given contact with a pre-filled message."""
-        url = f'https://web.whatsapp.com/send?phone={number}&text={urllib.parse.quote(message)}'
+        button = self.wait_for_selector(SEND_BUTTON_SELECTORS, wait_time)
+        if button is None:
+            warning_msg = "Warning: Send button not found using any locator."
+            log.warning(warning_msg)
+            print(warning_msg)
+            return None
+        with self.focused() as driver:
+            self._send_button_selector = driver.execute_script(
+                MATCHING_SELECTOR_JS, button, list(SEND_BUTTON_SELECTORS))
+        if self.verbose:
+            print("Send button found.")
+        return button
+
+    def open_work_tab(self):
+        """Open a blank tab that serial runs load contacts into."""
+        self.driver.switch_to.new_window('tab')
+        self._work_handles.append(self.driver.current_window_handle)
+        # Network blocking is per tab, so a reused tab only needs it once.
+        if self.block_resources:
+            block_resources(self.driver)
+
+    def open_contact(self, number, url, preloaded=False):
+        """Load the contact's pre-filled message URL in this worker's tab. With
+        preloaded, the serial pipeline has already started loading it."""
         try:
-            # Open new tab
-            self.driver.execute_script(f"window.open('{url}', '_blank');")
-            # Switch to the new tab (the last tab)
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            logging.info(f"Opened new tab for contact: {number}")
-            print(f"Opened new tab for contact: {number}")
-            # Allow extra time for WhatsApp to load the chat
-            time.sleep(random.uniform(2, 4))
+            if self.tab_pool is not None:
+                self._tab.handle = self.tab_pool.open_tab(url)
+            elif not preloaded:
+                self.driver.execute_cdp_cmd("Page.navigate", {"url": url})
+            log.info("Opened chat for contact: %s", number)
+            if self.verbose:
+                print(f"Opened chat for contact: {number}")
+            # Wait for WhatsApp to load the chat rather than sleeping a fixed time
+            self.wait_for_chat()
         except Exception as e:
-            logging.error(f"Error opening contact in new tab for {number}: {str(e)}")
-            print(f"Error opening contact in new tab for {number}: {str(e)}")
+            log.error("Error opening chat for %s: %s", number, e)
+            print(f"Error opening chat for {number}: {str(e)}")
             raise
 
-    def load_csv_to_dataframe(self, file_name):
+    def wait_for_chat(self, wait_time=20):
+        """Block until the chat composer or the invalid-number notice has rendered."""
+        self.wait_until(
+            lambda driver: driver.execute_script(CHAT_READY_JS, COMPOSER_SELECTOR, INVALID_NUMBER_TEXT),
+            wait_time
+        )
+
+    def load_contacts(self, file_name):
+        """Read (name, formatted number) pairs from the contacts CSV."""
         try:
-            df = pd.read_csv(file_name)
-            if 'Name' not in df.columns or 'Contact No' not in df.columns:
-                raise ValueError("CSV must have 'Name' and 'Contact No' columns.")
-            df['Contact No'] = df['Contact No'].astype(str).apply(self.format_phone_number)
+            # utf-8-sig drops the byte order mark that Excel puts on exported CSVs.
+            with open(file_name, newline='', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                if 'Name' not in (reader.fieldnames or []) or 'Contact No' not in reader.fieldnames:
+                    raise ValueError("CSV must have 'Name' and 'Contact No' columns.")
+                contacts = [(row['Name'], self.format_phone_number(row['Contact No'])) for row in reader]
             print(f"Loaded contacts from {file_name}.")
-            return df
+            return contacts
         except Exception as e:
-            logging.error(f"Error loading CSV {file_name}: {str(e)}")
+            log.error("Error loading CSV %s: %s", file_name, e)
             print(f"Error loading CSV {file_name}: {str(e)}")
             raise
 
     def send_message(self):
         """Send the pre-filled message on the current tab."""
+        from selenium.webdriver.support import expected_conditions as EC
+
         try:
             send_button = self.find_send_button()
             if send_button:
-                try:
-                    send_button.click()
-                except UnexpectedAlertPresentException:
-                    alert = self.driver.switch_to.alert
-                    print(f"Unexpected alert during send: {alert.text}")
-                    alert.accept()
-                    time.sleep(1)
-                    send_button.click()
-                # Extra delay to ensure message is delivered
-                time.sleep(random.uniform(1, 2))
-                self.randomized_delay()
-                logging.info("Message sent successfully.")
-                print("Message sent successfully.")
+                # Sends from parallel tabs take turns so the anti-ban pacing still holds.
+                with self.pacing_lock:
+                    with self.focused() as driver:
+                        try:
+                            send_button.click()
+                        except UnexpectedAlertPresentException:
+                            alert = driver.switch_to.alert
+                            print(f"Unexpected alert during send: {alert.text}")
+                            alert.accept()
+                            time.sleep(1)
+                            send_button.click()
+                    # The send button is swapped out once WhatsApp has queued the message
+                    try:
+                        self.wait_until(EC.staleness_of(send_button), 10)
+                    except TimeoutException:
+                        log.warning("Send button still present after click.")
+                    self.randomized_delay()
+                log.info("Message sent successfully.")
+                if self.verbose:
+                    print("Message sent successfully.")
                 return True
-            logging.warning("Send button not clickable.")
+            log.warning("Send button not clickable.")
             print("Warning: Send button not clickable.")
             return False
         except Exception as e:
-            logging.error(f"Error sending message: {str(e)}")
+            log.error("Error sending message: %s", e)
             print(f"Error sending message: {str(e)}")
             return False
 
-    def handle_invalid_number(self, number):
-        invalid_text = "Phone number shared via url is invalid."
+    def handle_invalid_number(self, number, wait_time=10):
         try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, f"//*[contains(text(), '{invalid_text}')]"))
-            )
-            logging.info(f"Invalid number detected: {number}")
+            self.wait_until(lambda driver: driver.execute_script(PAGE_HAS_TEXT_JS, INVALID_NUMBER_TEXT), wait_time)
+            log.info("Invalid number detected: %s", number)
             print(f"Invalid number detected: {number}")
             return True
         except TimeoutException:
             return False
 
-    def close_current_tab_and_switch_back(self):
-        """Close the current tab and switch back to the first tab."""
-        if len(self.driver.window_handles) > 1:
-            self.driver.close()
-            self.driver.switch_to.window(self.driver.window_handles[0])
-            print("Closed current tab and switched back to main tab.")
+    def release_tab(self):
+        """Close a parallel worker's tab, or blank the reusable work tab so the next
+        contact starts from an empty page."""
+        if self.tab_pool is not None:
+            if getattr(self._tab, 'handle', None):
+                self.tab_pool.close_tab(self._tab.handle)
+                self._tab.handle = None
+        elif self._work_handles:
+            self.driver.execute_cdp_cmd("Page.navigate", {"url": "about:blank"})
+
+    def prepare_jobs(self, contacts):
+        """Personalize every message and build its URL up front, so the browser
+        loop only does browser work. Returns (index, number, greeting_name, url) jobs."""
+        templates = random.choices(self.message_templates, k=len(contacts))
+        jobs = []
+        for index, ((full_name, number), template) in enumerate(zip(contacts, templates)):
+            greeting_name = self.extract_greeting_name(full_name)
+            if "{first_name}" in template:
+                personalized_message = template.replace("{first_name}", greeting_name)
+            else:
+                personalized_message = f"Hello {greeting_name}, " + template
+            url = self._base_url + urllib.parse.urlencode(
+                {'phone': number, 'text': personalized_message}, quote_via=urllib.parse.quote)
+            jobs.append((index, number, greeting_name, url))
+        return jobs
+
+    def process_contact(self, job, total, preloaded=False):
+        """Message one prepared job and checkpoint it. Returns (number, reason),
+        where reason is None on success."""
+        number, reason = self.message_contact(job, total, preloaded)
+        self.checkpoint(job[0], number, reason)
+        return number, reason
+
+    def message_contact(self, job, total, preloaded=False):
+        """Open the job's chat and send its message; never raises."""
+        index, number, greeting_name, url = job
+        try:
+            print(f"Processing {index+1}/{total}: {number} ({greeting_name})")
+            self.open_contact(number, url, preloaded)
+
+            # wait_for_chat has already settled the page, so a single probe is enough.
+            if self.handle_invalid_number(number, wait_time=0):
+                self.release_tab()
+                return number, 'Invalid number'
+
+            reason = None
+            if self.send_message():
+                print(f"Message sent to {number} ({greeting_name})")
+            else:
+                print(f"Failed to send message to {number} ({greeting_name})")
+                reason = 'Send failed'
+
+            self.release_tab()
+            return number, reason
+
+        except Exception as e:
+            error_str = f"Error with {number}: {str(e)}"
+            print(error_str)
+            try:
+                self.release_tab()
+            except Exception:
+                pass
+            return number, str(e)
+
+    def process_contacts(self, jobs, max_tabs=1, pipeline=False):
+        """Message every contact, running up to max_tabs of them concurrently in
+        separate tabs of the same browser. WhatsApp Web keeps only one active tab
+        per profile, so check that your account tolerates parallel tabs before
+        raising max_tabs; the same applies to pipeline below.
+
+        A serial run with pipeline set alternates between two work tabs and starts
+        loading the next chat while the current one is sent and paced. WhatsApp Web
+        may hand the session to the most recently loaded tab, so check that your
+        account tolerates this before enabling it.
+        """
+        # jobs may be the tail of a resumed run; count from the first contact.
+        total = jobs[-1][0] + 1 if jobs else 0
+        if max_tabs <= 1:
+            tab_count = 2 if pipeline else 1
+            while len(self._work_handles) < tab_count:
+                self.open_work_tab()
+            tabs = self._work_handles[:tab_count]
+            self.driver.switch_to.window(tabs[0])
+            results = []
+            for position, job in enumerate(jobs):
+                current = tabs[position % tab_count]
+                if pipeline and position + 1 < len(jobs):
+                    # Navigation does not count towards the send cadence, so the next
+                    # chat can load in the spare tab during this one's waits.
+                    self.driver.switch_to.window(tabs[(position + 1) % tab_count])
+                    self.driver.execute_cdp_cmd("Page.navigate", {"url": jobs[position + 1][3]})
+                # Always (re)select this job's tab: after the last look-ahead the
+                # driver would otherwise still be on the previous, blanked tab.
+                self.driver.switch_to.window(current)
+                results.append(self.process_contact(job, total, preloaded=pipeline and position > 0))
+            return results
+        self.tab_pool = TabPool(self.driver, max_tabs,
+                                prepare_tab=block_resources if self.block_resources else None)
+        try:
+            return self.tab_pool.map(lambda job: self.process_contact(job, total), jobs)
+        finally:
+            self.tab_pool = None
+
+    def close_work_tabs(self):
+        """Close the tabs opened by open_work_tab, which would otherwise pile up in a
+        pooled browser that outlives this run."""
+        for handle in self._work_handles:
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            except WebDriverException:
+                pass
+        self._work_handles = []
 
     def close_driver(self):
+        # For pooled browsers this only ends the WebDriver session; Chrome keeps running.
         if self.is_driver_available and self.driver:
+            self.close_work_tabs()
             self.driver.quit()
             self.is_driver_available = False
-            logging.info("WebDriver closed.")
+            log.info("WebDriver closed.")
             print("WebDriver closed.")
 
 # Usage example
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send WhatsApp messages to the contacts in contacts.csv.")
+    parser.add_argument('--refresh-driver', action='store_true',
+                        help="ignore the cached chromedriver path and resolve it again")
+    parser.add_argument('--block-resources', action='store_true',
+                        help="do not download stylesheets, fonts, images or trackers")
+    args = parser.parse_args()
     try:
-        instance = Whatsapp()
+        instance = Whatsapp(browser_pool=BrowserPool(), refresh_driver=args.refresh_driver,
+                            block_resources=args.block_resources)
         instance.open_whatsapp()
         
-        contacts = instance.load_csv_to_dataframe('contacts.csv')
-        invalid = pd.DataFrame(columns=['number', 'reason'])
-        
-        for index, row in contacts.iterrows():
-            try:
-                full_name = row['Name']
-                number = row['Contact No']
-                greeting_name = instance.extract_greeting_name(full_name)
-                chosen_template = random.choice(instance.message_templates)
-                if "{first_name}" in chosen_template:
-                    personalized_message = chosen_template.replace("{first_name}", greeting_name)
-                else:
-                    personalized_message = f"Hello {greeting_name}, " + chosen_template
-
-                print(f"Processing {index+1}/{len(contacts)}: {number} ({greeting_name})")
-                instance.open_contact_in_new_tab(number, personalized_message)
-                
-                if instance.handle_invalid_number(number):
-                    new_row = pd.DataFrame([[number, 'Invalid number']], columns=['number', 'reason'])
-                    invalid = pd.concat([invalid, new_row], ignore_index=True)
-                    instance.close_current_tab_and_switch_back()
-                    continue
-
-                if instance.send_message():
-                    print(f"Message sent to {number} ({greeting_name})")
-                else:
-                    print(f"Failed to send message to {number} ({greeting_name})")
-                    new_row = pd.DataFrame([[number, 'Send failed']], columns=['number', 'reason'])
-                    invalid = pd.concat([invalid, new_row], ignore_index=True)
-                    
-                instance.close_current_tab_and_switch_back()
-                    
-            except Exception as e:
-                error_str = f"Error with {number}: {str(e)}"
-                print(error_str)
-                new_row = pd.DataFrame([[number, str(e)]], columns=['number', 'reason'])
-                invalid = pd.concat([invalid, new_row], ignore_index=True)
-                try:
-                    instance.close_current_tab_and_switch_back()
-                except Exception:
-                    pass
+        contacts = instance.load_contacts('contacts.csv')
+        start = instance.load_state('contacts.csv')
+        if start:
+            print(f"Resuming after contact {start}/{len(contacts)} of the interrupted run.")
+        instance.open_report('invalid_numbers.csv', append=start > 0)
         
-        invalid.to_csv('invalid_numbers.csv', index=False)
+        jobs = instance.prepare_jobs(contacts)[start:]
+        # Raise max_tabs to overlap page loads across several tabs of the same browser.
+        instance.process_contacts(jobs, max_tabs=1)
+        instance.clear_checkpoint()
         print("Process completed. Check 'invalid_numbers.csv' for any issues.")
         
     except Exception as e:
         print(f"Script failed: {str(e)}")
-        logging.error(f"Script terminated due to: {str(e)}")
+        log.error("Script terminated due to: %s", e)
     finally:
-        instance.close_driver()
+        instance.close_report()
+        instance.close_driver()
\ No newline at end of file
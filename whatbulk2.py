@@ -1,78 +1,306 @@
+import argparse
+import copy
+import csv
+import functools
+import json
 import random
 import time
-import pandas as pd
+import warnings
 import urllib.parse
 import os
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import (TimeoutException, NoSuchElementException,
-                                        WebDriverException, UnexpectedAlertPresentException)
-from webdriver_manager.chrome import ChromeDriverManager
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+# pandas, selenium.webdriver and webdriver_manager are imported where they are used,
+# so that --help and argument errors do not pay for loading them.
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from browser_pool import BrowserPool, TabPool, block_resources, start_chrome
+
+WHATSAPP_URL = 'https://web.whatsapp.com'
+# Anti-ban pacing and the resume point survive restarts through this file.
+STATE_FILE = 'whatbulk2_state.json'
+
+# Result logs and their columns, streamed a row per contact.
+RESULT_LOGS = {
+    'results': ('send_results.csv', ['number', 'name', 'status', 'timestamp']),
+    'sent': ('sent_numbers.csv', ['number', 'name', 'timestamp']),
+    'invalid': ('invalid_numbers.csv', ['number', 'name', 'timestamp', 'error']),
+    'failed': ('failed_numbers.csv', ['number', 'name', 'timestamp', 'error']),
+}
+
+# Separators dropped from phone numbers, including the tabs and no-break spaces
+# that spreadsheet exports tend to leave in.
+_DROP_TABLE = str.maketrans('', '', ' -\t\r\n\u00a0')
+
+logging.basicConfig(filename='whatsapp.log', level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+log = logging.getLogger(__name__)
+
+# Present once WhatsApp Web has logged in and loaded the chat list.
+CHATS_SELECTOR = "div[title='Chats']"
+
+# The chat composer, present once a /send deep link has opened the chat.
+COMPOSER_SELECTOR = "div[title='Type a message']"
+
+# Attachment menu icon and the photo/video file input it reveals.
+ATTACH_SELECTOR = "span[data-icon='clip']"
+MEDIA_INPUT_SELECTOR = "input[accept*='image/']"
+
+# Waits for elements that should already be on screen after the previous step.
+ELEMENT_TIMEOUT = 8
+
+# Send button candidates in priority order.
+SEND_BUTTON_SELECTORS = (
+    "button[aria-label='Send']",
+    "button[data-testid='compose-btn-send']",
+    "span[data-icon='send']",
+    "button[class*='send']",
+)
+
+# Last resort for text messages: the composer itself, sent with the Enter key.
+COMPOSER_FALLBACK_SELECTOR = "footer div[contenteditable='true']"
+
+# All send button candidates as one selector list, for a single clickable wait.
+ANY_SEND_BUTTON_SELECTOR = ", ".join(SEND_BUTTON_SELECTORS)
+
+# Returns the element for the first selector in arguments[0] that matches, or null.
+QUERY_SELECTOR_JS = """
+for (const selector of arguments[0]) {
+    const el = document.querySelector(selector);
+    if (el) return el;
+}
+return null;
+"""
+
+# Returns the first selector in arguments[1] that element arguments[0] matches, or null.
+MATCHING_SELECTOR_JS = "return arguments[1].find(s => arguments[0].matches(s)) || null;"
+
+# Focuses arguments[0] and reports whether it actually became the active element.
+FOCUS_ELEMENT_JS = "arguments[0].focus(); return document.activeElement === arguments[0];"
+
+# Async script timeout for the session; wait_for_selector polls in slices shorter than this.
+SCRIPT_TIMEOUT = 60
+
+# Resolves like QUERY_SELECTOR_JS as soon as any selector matches, or with null after
+# arguments[1] ms. Documents flagged stale by open_chat are skipped until replaced.
+WAIT_FOR_SELECTOR_JS = """
+const [selectors, timeout, done] = arguments;
+const deadline = Date.now() + timeout;
+const find = () => {
+    for (const selector of selectors) {
+        const el = document.querySelector(selector);
+        if (el) return el;
+    }
+    return null;
+};
+(function poll() {
+    const el = window.__whatbulkStale ? null : find();
+    if (el || Date.now() >= deadline) {
+        done(el);
+    } else {
+        setTimeout(poll, 100);
+    }
+})();
+"""
+
+# message_type -> (function sending the open chat's message, whether the chat URL
+# pre-fills the message text). Media chats open empty and take the text as a caption.
+MESSAGE_TYPES = {
+    'text': (lambda sender, message: sender.send_text_message(), True),
+    'media': (lambda sender, message: sender.send_media_message(message=message), False),
+}
+
+# Read a message template, once per path per process however many senders load it.
+@functools.lru_cache(maxsize=None)
+def read_message_template(filename):
+    with open(filename, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+# Thread-safe token bucket: take() blocks until one of `rate` tokens per second is
+# free, allowing bursts of up to `burst`. One bucket can be shared by several senders.
+class TokenBucket:
+    def __init__(self, rate=10, burst=5):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # Reserve the token now and sleep off any deficit outside the lock.
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
 
 class WhatsAppSender:
     def __init__(self, 
                  message_files=('message1.txt', 'message2.txt'),
                  media_path=None,
                  message_type="text",  # Options: "text" or "media"
-                 short_delay=(0.5, 2),
+                 short_delay=None,  # Deprecated and ignored; pass limiter to pace sends
                  long_break=(30, 60),
                  message_threshold=(10, 15),
-                 debug=True):
-        # Basic settings and debug flag
+                 debug=True,
+                 browser_pool=None,
+                 refresh_driver=False,
+                 block_resources=False,
+                 limiter=None):
+        # Basic settings and debug flag; debug records go to whatsapp.log.
         self.debug = debug
+        if debug:
+            log.setLevel(logging.DEBUG)
         self.debug_print("Debug mode enabled.")
         self.message_count = 0
-        self.short_delay_range = short_delay
+        if short_delay is not None:
+            warnings.warn("short_delay is ignored; sends are paced by the limiter (a TokenBucket).",
+                          DeprecationWarning, stacklevel=2)
         self.long_break_range = long_break
         self.message_threshold_range = message_threshold
         self.random_break_threshold = random.randint(*self.message_threshold_range)
         # Load message templates from the specified files
         self.message_templates = [self.load_message_template(f) for f in message_files]
+        # (template index, greeting) -> (formatted, URL-encoded) message; first names repeat a lot.
+        self._encoded_cache = {}
+        self._base_url = f'{WHATSAPP_URL}/send?'
         self.media_path = media_path  # Set to a valid file path when sending media
+        # File inputs need an absolute path; normalize it once rather than per upload.
+        self._abs_media = os.path.abspath(media_path) if media_path else None
         self.message_type = message_type.lower()  # "text" or "media"
+        if self.message_type not in MESSAGE_TYPES:
+            raise ValueError(f"Unknown message_type {message_type!r}; use one of {sorted(MESSAGE_TYPES)}.")
+        self._send, self._prefill_text = MESSAGE_TYPES[self.message_type]
         self.driver = None
         self.is_driver_active = False
+        # When set, attach to a warm pooled Chrome instead of launching a new one.
+        self.browser_pool = browser_pool
+        # Re-resolve chromedriver through webdriver_manager instead of the cached path.
+        self.refresh_driver = refresh_driver
+        # Skip stylesheets, fonts, images and trackers in every tab that loads a chat.
+        self.block_resources = block_resources
+        # Set while process_contacts runs contacts in parallel tabs; each worker
+        # thread keeps the handle of its own tab in self._tab.
+        self.tab_pool = None
+        self._tab = threading.local()
+        self.pacing_lock = threading.Lock()
+        self.results_lock = threading.Lock()
+        # TokenBucket capping the contact rate; worker senders share this one.
+        self.limiter = limiter if limiter is not None else TokenBucket()
         
-        # Detailed contact handling: DataFrames to store outcomes
-        self.sent_numbers_df = pd.DataFrame(columns=['number', 'name', 'timestamp'])
-        self.invalid_numbers_df = pd.DataFrame(columns=['number', 'name', 'timestamp', 'error'])
-        self.failed_numbers_df = pd.DataFrame(columns=['number', 'name', 'timestamp', 'error'])
+        # Detailed contact handling: process_contacts opens the RESULT_LOGS and rows
+        # are written and flushed as each contact finishes, so a crash mid-run keeps
+        # everything recorded so far. Worker senders share the files.
+        self._result_logs = {}
+        self._owns_result_logs = True
+        # Resume bookkeeping, shared with worker senders: contacts up to last_index
+        # are done; finished holds the ones completed out of order.
+        self.state_lock = threading.Lock()
+        self._resume = {'last_index': -1, 'finished': set(), 'csv_mtime': None}
         
-        # Configure logging for debugging and error tracking
-        logging.basicConfig(filename='whatsapp.log', level=logging.INFO,
-                            format='%(asctime)s - %(levelname)s - %(message)s')
+        # The send button selector that matched last; tried alone before the full list.
+        self._send_button_selector = None
+
         print("WhatsAppSender initialized.")
 
-    # Debug print helper: prints only if debug mode is enabled.
-    def debug_print(self, message):
-        if self.debug:
-            print("[DEBUG]", message)
+    # Open the RESULT_LOGS with their header rows. A resumed run appends to the logs
+    # of the run it continues; any other run starts new ones. shutdown closes them.
+    def open_result_logs(self, append=False):
+        self.close_result_logs()
+        for kind, (filename, columns) in RESULT_LOGS.items():
+            f = open(filename, 'a' if append else 'w', newline='', encoding='utf-8', buffering=1 << 16)
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(columns)
+            self._result_logs[kind] = (f, writer)
+
+    def close_result_logs(self):
+        for f, _ in self._result_logs.values():
+            f.close()
+        self._result_logs.clear()
+
+    # Append a row to one of the result logs and flush it before the contact is
+    # checkpointed.
+    def write_result(self, kind, *row):
+        with self.results_lock:
+            f, writer = self._result_logs[kind]
+            writer.writerow(row)
+            f.flush()
+
+    # Restore the anti-ban counter from the previous run and return the index of
+    # the first contact to process, which is past the saved resume point only when
+    # csv_file is unchanged since that run.
+    def load_state(self, csv_file):
+        self._resume['csv_mtime'] = os.path.getmtime(csv_file)
+        try:
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return 0
+        self.message_count = state.get('count', 0)
+        self.random_break_threshold = state.get('threshold', self.random_break_threshold)
+        if state.get('csv_mtime') != self._resume['csv_mtime']:
+            return 0
+        self._resume['last_index'] = state.get('last_index', -1)
+        return self._resume['last_index'] + 1
+
+    def save_state(self):
+        tmp_file = STATE_FILE + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'count': self.message_count,
+                       'threshold': self.random_break_threshold,
+                       'last_index': self._resume['last_index'],
+                       'csv_mtime': self._resume['csv_mtime']}, f)
+        os.replace(tmp_file, STATE_FILE)
+
+    # Mark the contact at index as done and save the state. The resume point only
+    # moves past contacts whose predecessors are all done as well.
+    def checkpoint(self, index):
+        with self.state_lock:
+            self._resume['finished'].add(index)
+            while self._resume['last_index'] + 1 in self._resume['finished']:
+                self._resume['last_index'] += 1
+                self._resume['finished'].discard(self._resume['last_index'])
+            self.save_state()
+
+    # Forget the resume point after a complete run; the pacing is kept.
+    def clear_checkpoint(self):
+        with self.state_lock:
+            self._resume['last_index'] = -1
+            self._resume['finished'].clear()
+            self.save_state()
+
+    # Debug log helper: logs only if debug mode is enabled, formatting the %-style
+    # args lazily. The whole body is compiled away under python -O.
+    def debug_print(self, message, *args):
+        if __debug__:
+            if self.debug:
+                log.debug(message, *args)
 
     # Load a message template from a text file.
     def load_message_template(self, filename):
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                self.debug_print(f"Loaded template: {filename}")
-                return content
+            content = read_message_template(filename)
+            self.debug_print("Loaded template: %s", filename)
+            return content
         except FileNotFoundError:
-            logging.error(f"Message file {filename} not found. Using default.")
+            log.error("Message file %s not found. Using default.", filename)
             print(f"Warning: {filename} not found. Using default message.")
             return "Hello {first_name}, this is a default message."
 
-    # Format the phone number, adding the +91 country code when needed.
-    def format_number(self, number):
-        number = str(number).strip().replace(" ", "").replace("-", "")
-        if number.startswith('+'):
-            return number
-        if number.startswith('0'):
-            number = number[1:]
-        return f"+91{number}"
+    # Format a column of phone numbers in one vectorized pass, adding the +91
+    # country code where needed.
+    def format_numbers(self, numbers):
+        import numpy as np
+
+        numbers = numbers.astype(str).str.translate(_DROP_TABLE)
+        local = '+91' + numbers.str.replace(r'^0', '', regex=True)
+        return np.where(numbers.str.startswith('+'), numbers, local)
 
     # Extract the greeting name from the full name.
     def get_greeting_name(self, full_name):
@@ -83,48 +311,110 @@ class WhatsAppSender:
 
     # Initialize the Chrome driver using a dedicated profile.
     def init_driver(self):
-        profile_dir = os.path.abspath('./chrome_profile')
-        if not os.path.exists(profile_dir):
-            try:
-                os.makedirs(profile_dir)
-                print(f"Created directory: {profile_dir}")
-            except Exception as e:
-                raise PermissionError(f"Unable to create directory {profile_dir}: {e}")
-        if not os.access(profile_dir, os.W_OK):
-            raise PermissionError(f"Directory {profile_dir} is not writable. Please check permissions.")
-        
+        from selenium import webdriver
+
         chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
-        chrome_options.add_argument("--remote-debugging-port=9222")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+        if self.browser_pool:
+            # Attached sessions reject most launch options, so only the address is set.
+            chrome_options.debugger_address = self.browser_pool.acquire()
+        else:
+            profile_dir = os.path.abspath('./chrome_profile')
+            if not os.path.exists(profile_dir):
+                try:
+                    os.makedirs(profile_dir)
+                    print(f"Created directory: {profile_dir}")
+                except Exception as e:
+                    raise PermissionError(f"Unable to create directory {profile_dir}: {e}")
+            if not os.access(profile_dir, os.W_OK):
+                raise PermissionError(f"Directory {profile_dir} is not writable. Please check permissions.")
+            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+            chrome_options.add_argument("--remote-debugging-port=9222")
+            chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
         
         try:
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.driver = start_chrome(chrome_options, refresh_driver=self.refresh_driver)
+            self.driver.set_script_timeout(SCRIPT_TIMEOUT)
+            if self.block_resources:
+                block_resources(self.driver)
             self.is_driver_active = True
             print("Chrome driver initialized successfully.")
         except Exception as e:
-            logging.critical(f"Driver initialization failed: {str(e)}")
+            log.critical("Driver initialization failed: %s", e)
             raise
 
     # Wait for the user to log in via WhatsApp Web.
     def wait_for_login(self):
-        self.driver.get('https://web.whatsapp.com')
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        # A warm pooled browser may already have WhatsApp Web loaded.
+        if not self.driver.current_url.startswith(WHATSAPP_URL):
+            self.driver.get(WHATSAPP_URL)
         print("Please scan the QR code if required. Waiting for WhatsApp Web login...")
         try:
             WebDriverWait(self.driver, 120).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@title='Chats']"))
+                EC.presence_of_element_located((By.CSS_SELECTOR, CHATS_SELECTOR))
             )
             print("Login successful. WhatsApp chats loaded.")
         except TimeoutException:
-            logging.error("Login timeout. QR code not scanned.")
+            log.error("Login timeout. QR code not scanned.")
             raise
 
-    # Introduce a randomized delay to mimic human behavior.
+    # Navigate the already-open WhatsApp Web tab in place instead of spawning a new tab.
+    # The current document is flagged as stale so wait_for_selector ignores it until
+    # the new page has replaced it.
+    def open_chat(self, url):
+        self.driver.execute_script(
+            "window.__whatbulkStale = true; window.location.href = arguments[0];", url)
+
+    # Yield the driver with this worker's tab as the current window.
+    @contextmanager
+    def focused(self):
+        if self.tab_pool is None:
+            yield self.driver
+        else:
+            with self.tab_pool.use(self._tab.handle) as driver:
+                yield driver
+
+    # WebDriverWait that releases the driver to other tabs between attempts.
+    def wait_until(self, condition, timeout):
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        if self.tab_pool is None:
+            return WebDriverWait(self.driver, timeout).until(condition)
+        return self.tab_pool.wait_until(self._tab.handle, condition, timeout)
+
+    # Poll for a CSS selector (or a priority-ordered sequence of them) inside the page
+    # with a single async script per attempt rather than repeated WebDriverWait round
+    # trips. Returns the first matching element or None.
+    def wait_for_selector(self, selectors, timeout=20):
+        if isinstance(selectors, str):
+            selectors = [selectors]
+        selectors = list(selectors)
+        if self.tab_pool is not None:
+            # An async poll would hold the shared driver; probe in short turns instead.
+            try:
+                return self.wait_until(lambda d: d.execute_script(QUERY_SELECTOR_JS, selectors), timeout)
+            except TimeoutException:
+                return None
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                element = self.driver.execute_async_script(
+                    WAIT_FOR_SELECTOR_JS, selectors, int(min(remaining, SCRIPT_TIMEOUT - 1) * 1000))
+                if element is not None:
+                    return element
+            except WebDriverException:
+                # The document was unloaded mid-poll by a pending navigation; retry.
+                time.sleep(0.1)
+
+    # Count a sent message and take a randomized long break every few messages to
+    # mimic human behavior. The spacing between sends is left to the rate limiter.
     def randomized_delay(self):
-        delay = random.uniform(*self.short_delay_range)
-        print(f"Waiting for {delay:.2f} seconds before next action.")
-        time.sleep(delay)
         self.message_count += 1
         if self.message_count >= self.random_break_threshold:
             pause = random.randint(*self.long_break_range)
@@ -133,42 +423,78 @@ class WhatsAppSender:
             self.message_count = 0
             self.random_break_threshold = random.randint(*self.message_threshold_range)
 
-    # Find the send button using multiple XPath strategies.
+    # Find the send button with one in-page lookup over all selector strategies. The
+    # strategy that worked for the previous contact is tried on its own first, since
+    # the page layout does not change within a session. The composer is only used
+    # once every real send button has had its full wait, and is never remembered.
     def find_send_button(self):
-        xpath_strategies = [
-            "//button[@aria-label='Send']",
-            "//button[@data-testid='compose-btn-send']",
-            "//span[@data-icon='send']",
-            "//button[contains(@class, 'send')]",
-            "//div[@contenteditable='true']"  # Fallback for Enter key simulation
-        ]
-        for xpath in xpath_strategies:
-            try:
-                element = WebDriverWait(self.driver, 15).until(
-                    EC.element_to_be_clickable((By.XPATH, xpath))
-                )
-                self.debug_print(f"Send button found using XPath: {xpath}")
+        if self._send_button_selector is not None:
+            element = self.wait_for_selector(self._send_button_selector, timeout=3)
+            if element is not None:
+                self.debug_print("Send button found.")
                 return element
-            except (TimeoutException, NoSuchElementException):
-                continue
-        logging.warning("Send button not found using any strategy.")
-        return None
+        element = self.wait_for_selector(SEND_BUTTON_SELECTORS, timeout=15)
+        if element is not None:
+            with self.focused() as driver:
+                self._send_button_selector = driver.execute_script(
+                    MATCHING_SELECTOR_JS, element, list(SEND_BUTTON_SELECTORS))
+            self.debug_print("Send button found.")
+            return element
+        element = self.wait_for_selector(COMPOSER_FALLBACK_SELECTOR, timeout=2)
+        if element is None:
+            log.warning("Send button not found using any strategy.")
+            return None
+        log.warning("Send button not found; falling back to the Enter key in the composer.")
+        return element
+
+    # Wait until WhatsApp has taken the message before the chat is left: a clicked
+    # send button is swapped out, and a composer sent with Enter is emptied.
+    def confirm_sent(self, element, cleared=False, timeout=10):
+        from selenium.webdriver.support import expected_conditions as EC
+
+        condition = (lambda driver: not element.text.strip()) if cleared else EC.staleness_of(element)
+        try:
+            self.wait_until(condition, timeout)
+        except TimeoutException:
+            log.warning("Message not confirmed as sent within %s seconds.", timeout)
+
+    # Press Enter in the composer with raw CDP key events rather than a WebDriver
+    # Actions round trip; falls back to send_keys if the composer will not take focus.
+    def press_enter(self, composer):
+        from selenium.webdriver.common.keys import Keys
+
+        if not self.driver.execute_script(FOCUS_ELEMENT_JS, composer):
+            composer.send_keys(Keys.ENTER)
+            return
+        for event_type in ("keyDown", "keyUp"):
+            self.driver.execute_cdp_cmd("Input.dispatchKeyEvent", {
+                "type": event_type,
+                "key": "Enter",
+                "code": "Enter",
+                "windowsVirtualKeyCode": 13,
+                "nativeVirtualKeyCode": 13,
+            })
 
     # Send a text message using the found send button.
     def send_text_message(self):
         send_element = self.find_send_button()
         if send_element:
             try:
-                if send_element.tag_name.lower() == 'div':
-                    send_element.send_keys(Keys.ENTER)
-                    print("Text message sent using Enter key.")
-                else:
-                    send_element.click()
-                    print("Text message sent by clicking the send button.")
-                self.randomized_delay()
+                # Sends from parallel tabs take turns so the anti-ban pacing still holds.
+                with self.pacing_lock:
+                    with self.focused():
+                        is_composer = send_element.tag_name.lower() == 'div'
+                        if is_composer:
+                            self.press_enter(send_element)
+                            self.debug_print("Text message sent using Enter key.")
+                        else:
+                            send_element.click()
+                            self.debug_print("Text message sent by clicking the send button.")
+                    self.confirm_sent(send_element, cleared=is_composer)
+                    self.randomized_delay()
                 return True
             except Exception as e:
-                logging.error(f"Failed to send text message: {str(e)}")
+                log.error("Failed to send text message: %s", e)
                 print(f"Error: {str(e)}")
                 return False
         else:
@@ -177,176 +503,264 @@ class WhatsAppSender:
 
     # Send a media message (e.g., an image) with an optional accompanying text.
     def send_media_message(self, message=""):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+
         # Click the attachment (clip) icon.
         try:
-            attachment_button = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.XPATH, "//span[@data-icon='clip']"))
+            attachment_button = self.wait_until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ATTACH_SELECTOR)), ELEMENT_TIMEOUT
             )
-            attachment_button.click()
-            print("Attachment button clicked.")
+            with self.focused():
+                attachment_button.click()
+            self.debug_print("Attachment button clicked.")
         except Exception as e:
-            logging.error(f"Attachment button not found: {str(e)}")
+            log.error("Attachment button not found: %s", e)
             print(f"Error finding attachment button: {str(e)}")
             return False
         
         # Locate the file input element and upload the media.
         try:
-            file_input = WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, "//input[@accept='image/*,video/mp4,video/3gpp,video/quicktime']")
-                )
+            file_input = self.wait_until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, MEDIA_INPUT_SELECTOR)), ELEMENT_TIMEOUT
             )
-            file_input.send_keys(self.media_path)
-            print(f"Media file '{self.media_path}' uploaded.")
-            time.sleep(1)  # Wait for the media preview to load
+            with self.focused():
+                file_input.send_keys(self._abs_media)
+            self.debug_print("Media file '%s' uploaded.", self._abs_media)
         except Exception as e:
-            logging.error(f"Error uploading media: {str(e)}")
+            log.error("Error uploading media: %s", e)
             print(f"Error uploading media: {str(e)}")
             return False
         
         # If an accompanying text is provided, add it.
         if message:
             try:
-                text_box = WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.XPATH, "//div[@title='Type a message']"))
+                text_box = self.wait_until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, COMPOSER_SELECTOR)), ELEMENT_TIMEOUT
                 )
-                text_box.send_keys(message)
-                print("Accompanying message added with media.")
+                with self.focused():
+                    text_box.send_keys(message)
+                self.debug_print("Accompanying message added with media.")
             except Exception as e:
-                logging.error(f"Accompanying text box not found: {str(e)}")
+                log.error("Accompanying text box not found: %s", e)
                 print(f"Error adding accompanying message: {str(e)}")
         
-        # Click the send button.
+        # Click the send button; it only becomes clickable once the media preview has loaded.
+        # One wait covers every send button variant instead of just the aria-label one.
         try:
-            send_button = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[@aria-label='Send']"))
+            send_button = self.wait_until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, ANY_SEND_BUTTON_SELECTOR)), 15
             )
-            send_button.click()
-            print("Media message sent.")
-            self.randomized_delay()
+            with self.pacing_lock:
+                with self.focused():
+                    send_button.click()
+                self.confirm_sent(send_button)
+                self.debug_print("Media message sent.")
+                self.randomized_delay()
             return True
         except Exception as e:
-            logging.error(f"Failed to send media message: {str(e)}")
+            log.error("Failed to send media message: %s", e)
             print(f"Error sending media message: {str(e)}")
             return False
 
-    # Check if an invalid number prompt appears on the page.
+    # Check if an invalid number prompt appears on the page. The prompt is rendered
+    # as the chat loads, so one non-throwing probe of the settled page is enough.
     def is_invalid_number(self):
-        try:
-            WebDriverWait(self.driver, 5).until(
-                EC.presence_of_element_located((By.XPATH, "//div[contains(text(), 'invalid')]"))
-            )
-            return True
-        except TimeoutException:
-            return False
+        from selenium.webdriver.common.by import By
 
-    # Close the current browser tab and return to the main tab.
-    def close_current_tab(self):
-        if len(self.driver.window_handles) > 1:
-            self.driver.close()
-            self.driver.switch_to.window(self.driver.window_handles[0])
-            time.sleep(0.5)
-            print("Closed current tab and switched back to main tab.")
-
-    # Helper method to add a contact's result into a DataFrame.
-    def add_contact_result(self, df, number, name, error=""):
-        # If an error message is provided, include it in the DataFrame.
-        if error:
-            new_row = pd.DataFrame([[number, name, pd.Timestamp.now(), error]], 
-                                   columns=df.columns)
-        else:
-            new_row = pd.DataFrame([[number, name, pd.Timestamp.now()]], 
-                                   columns=df.columns)
-        return pd.concat([df, new_row], ignore_index=True)
+        with self.focused() as driver:
+            return len(driver.find_elements(By.XPATH, "//div[contains(text(), 'invalid')]")) > 0
+
+    # Personalize template t_idx for greeting and cache it with its URL encoding.
+    def encode_message(self, t_idx, greeting):
+        formatted = self.message_templates[t_idx].replace("{first_name}", greeting)
+        cached = self._encoded_cache[(t_idx, greeting)] = (formatted, urllib.parse.quote(formatted, safe=''))
+        return cached
+
+    # Fill the message cache for every template and distinct greeting among names,
+    # so the per-contact loop only does dict lookups.
+    def prepare_messages(self, names):
+        for greeting in {self.get_greeting_name(name) for name in names}:
+            for t_idx in range(len(self.message_templates)):
+                self.encode_message(t_idx, greeting)
 
     # Handle an individual contact by opening a chat and sending the appropriate message.
-    def handle_contact(self, number, name):
+    # stamp is the contact's UTC time, as written to the result logs.
+    def handle_contact(self, number, name, stamp):
         greeting = self.get_greeting_name(name)
-        template = random.choice(self.message_templates)
-        formatted_message = template.replace("{first_name}", greeting)
-        encoded_message = urllib.parse.quote(formatted_message)
+        key = (random.randrange(len(self.message_templates)), greeting)
+        cached = self._encoded_cache.get(key)
+        if cached is None:
+            cached = self.encode_message(*key)
+        formatted_message, encoded_message = cached
         print(f"Processing contact: {number} (Greeting: {greeting})")
 
-        # Build the WhatsApp Web URL based on the message type.
-        if self.message_type == "text":
-            url = f'https://web.whatsapp.com/send?phone={number}&text={encoded_message}'
-        elif self.message_type == "media":
-            url = f'https://web.whatsapp.com/send?phone={number}&text='  # Open chat with empty text field
-        else:
-            url = f'https://web.whatsapp.com/send?phone={number}&text={encoded_message}'
+        # Build the WhatsApp Web URL; media chats open with an empty text field. The
+        # text is already encoded (as urlencode would), so only the number is encoded here.
+        text = encoded_message if self._prefill_text else ''
+        url = (self._base_url + urllib.parse.urlencode({'phone': number}, quote_via=urllib.parse.quote)
+               + '&text=' + text)
 
         try:
-            print(f"Opening chat for {number}...")
-            self.driver.execute_script(f"window.open('{url}');")
-            self.driver.switch_to.window(self.driver.window_handles[-1])
-            WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@title='Type a message']"))
-            )
+            self.debug_print("Opening chat for %s...", number)
+            if self.tab_pool is not None:
+                self._tab.handle = self.tab_pool.open_tab(url)
+            else:
+                self.open_chat(url)
+            chat_loaded = self.wait_for_selector(COMPOSER_SELECTOR, timeout=20) is not None
             
             if self.is_invalid_number():
                 print(f"Invalid number detected: {number}")
-                self.invalid_numbers_df = self.add_contact_result(self.invalid_numbers_df, number, name, "Invalid number")
+                self.write_result('invalid', number, name, stamp, "Invalid number")
                 return "invalid"
+            if not chat_loaded:
+                raise TimeoutException("Chat did not load within 20 seconds.")
             
             # Send the message based on the selected type.
-            if self.message_type == "text":
-                success = self.send_text_message()
-            elif self.message_type == "media":
-                success = self.send_media_message(message=formatted_message)
-            else:
-                success = self.send_text_message()
+            success = self._send(self, formatted_message)
             
             if success:
                 print(f"Message successfully sent to {number}.")
-                self.sent_numbers_df = self.add_contact_result(self.sent_numbers_df, number, name)
+                self.write_result('sent', number, name, stamp)
                 return "success"
             else:
                 print(f"Failed to send message to {number}.")
-                self.failed_numbers_df = self.add_contact_result(self.failed_numbers_df, number, name, "Failed to send")
+                self.write_result('failed', number, name, stamp, "Failed to send")
                 return "failed"
         except Exception as e:
-            logging.error(f"Error handling contact {number}: {str(e)}")
+            log.error("Error handling contact %s: %s", number, e)
             print(f"Error handling contact {number}: {str(e)}")
-            self.failed_numbers_df = self.add_contact_result(self.failed_numbers_df, number, name, str(e))
+            self.write_result('failed', number, name, stamp, str(e))
             return "error"
         finally:
-            self.close_current_tab()
+            if self.tab_pool is not None and getattr(self._tab, 'handle', None):
+                self.tab_pool.close_tab(self._tab.handle)
+                self._tab.handle = None
+
+    # Handle one (index, number, name) contact, record the outcome in
+    # send_results.csv and checkpoint it. One clock read serves every log row.
+    def process_contact(self, contact):
+        index, number, name = contact
+        print(f"Processing row {index + 1}: {number}, {name}")
+        self.limiter.take()
+        stamp = datetime.fromtimestamp(time.time(), timezone.utc).isoformat()
+        result = self.handle_contact(number, name, stamp)
+        self.write_result('results', number, name, result, stamp)
+        self.checkpoint(index)
+        return {
+            'number': number,
+            'name': name,
+            'status': result,
+            'timestamp': stamp
+        }
+
+    # Read only the contact columns, with pyarrow's multithreaded parser when available.
+    def read_contacts_csv(self, csv_file):
+        import pandas as pd
+
+        header = pd.read_csv(csv_file, nrows=0).columns
+        columns = [column for column in ('Contact No', 'Name') if column in header]
+        # Strings throughout: no dtype inference, numbers keep their '+' and leading
+        # zeros, and empty cells stay '' instead of NaN.
+        options = dict(usecols=columns, dtype={column: 'string' for column in columns}, keep_default_na=False)
+        try:
+            return pd.read_csv(csv_file, engine='pyarrow', dtype_backend='pyarrow', **options)
+        except (ImportError, TypeError):
+            # pyarrow is not installed, or pandas predates dtype_backend.
+            return pd.read_csv(csv_file, engine='c', **options)
+
+    # A sender for another browser of the pool: the same settings, result logs and
+    # rate limiter, but its own driver, tabs and anti-ban counter.
+    def spawn_worker(self):
+        worker = copy.copy(self)
+        worker.driver = None
+        worker.is_driver_active = False
+        worker.tab_pool = None
+        worker._tab = threading.local()
+        worker.pacing_lock = threading.Lock()
+        worker.message_count = 0
+        worker._send_button_selector = None
+        # The result logs stay owned, and are closed, by this sender.
+        worker._owns_result_logs = False
+        return worker
 
-    # Process all contacts from a CSV file.
-    def process_contacts(self, csv_file):
+    # Spread contacts round-robin over `workers` browsers of the pool, each with its
+    # own profile (chrome_profile_<i>) and WhatsApp login; this sender drives the
+    # first. Returns the results in contact order.
+    def process_with_workers(self, contacts, workers):
+        if self.browser_pool is None or self.browser_pool.size < workers:
+            raise ValueError(f"{workers} workers need a BrowserPool of at least {workers} browsers.")
+        senders = [self]
         try:
-            df = pd.read_csv(csv_file)
+            for _ in range(workers - 1):
+                worker = self.spawn_worker()
+                senders.append(worker)
+                worker.init_driver()
+                worker.wait_for_login()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(
+                    lambda i: [senders[i].process_contact(c) for c in contacts[i::workers]], range(workers)))
+        finally:
+            for worker in senders[1:]:
+                worker.shutdown()
+        results = [None] * len(contacts)
+        for i, part in enumerate(parts):
+            results[i::workers] = part
+        return results
+
+    # Process all contacts from a CSV file, up to max_tabs of them concurrently in
+    # separate tabs of the same browser, or spread over several browsers of the
+    # pool when workers is above one.
+    # Running several tabs at once: WhatsApp Web keeps only one active tab per
+    # profile and may hand the session to the most recently loaded one, so check
+    # that your account tolerates this before raising max_tabs.
+    # An interrupted run of the same, unmodified csv_file resumes after its last
+    # finished contact.
+    def process_contacts(self, csv_file, max_tabs=1, workers=1):
+        try:
+            df = self.read_contacts_csv(csv_file)
             print(f"Loaded contacts from {csv_file}. Total contacts: {len(df)}")
         except Exception as e:
             print(f"Error reading CSV file: {str(e)}")
             return
         
-        results = []
-        for index, row in df.iterrows():
-            number = self.format_number(row['Contact No'])
-            name = row.get('Name', '')
-            print(f"Processing row {index + 1}: {number}, {name}")
-            result = self.handle_contact(number, name)
-            results.append({
-                'number': number,
-                'name': name,
-                'status': result,
-                'timestamp': pd.Timestamp.now()
-            })
-            time.sleep(random.uniform(0.5, 1.5))  # Delay between processing contacts
+        # Plain column arrays: no per-row Series or namedtuple.
+        numbers = self.format_numbers(df['Contact No'])
+        if 'Name' in df:
+            names = df['Name'].to_numpy()
+        else:
+            names = [''] * len(df)
+        self.prepare_messages(names)
+        contacts = [(index, number, name) for index, (number, name) in enumerate(zip(numbers, names))]
+
+        start = self.load_state(csv_file)
+        if start:
+            print(f"Resuming after row {start}/{len(contacts)} of the interrupted run.")
+        self.open_result_logs(append=start > 0)
+        contacts = contacts[start:]
+
+        if workers > 1:
+            results = self.process_with_workers(contacts, workers)
+        elif max_tabs <= 1:
+            results = [self.process_contact(contact) for contact in contacts]
+        else:
+            self.tab_pool = TabPool(self.driver, max_tabs,
+                                    prepare_tab=block_resources if self.block_resources else None)
+            try:
+                results = self.tab_pool.map(self.process_contact, contacts)
+            finally:
+                self.tab_pool = None
         
-        result_df = pd.DataFrame(results)
-        result_df.to_csv('send_results.csv', index=False)
+        self.clear_checkpoint()
         print("All contacts processed. Results saved to send_results.csv")
-        
-        # Save detailed logs for further analysis.
-        self.sent_numbers_df.to_csv('sent_numbers.csv', index=False)
-        self.invalid_numbers_df.to_csv('invalid_numbers.csv', index=False)
-        self.failed_numbers_df.to_csv('failed_numbers.csv', index=False)
         print("Detailed logs saved: sent_numbers.csv, invalid_numbers.csv, failed_numbers.csv")
+        return results
 
-    # Safely shutdown the driver.
+    # Safely shutdown the driver and close the result logs. Pooled browsers keep
+    # running for the next run.
     def shutdown(self):
+        if self._owns_result_logs:
+            self.close_result_logs()
         if self.is_driver_active and self.driver:
             self.driver.quit()
             self.is_driver_active = False
@@ -354,20 +768,34 @@ class WhatsAppSender:
 
 # Main execution block
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send WhatsApp messages to the contacts in contacts.csv.")
+    parser.add_argument('--refresh-driver', action='store_true',
+                        help="ignore the cached chromedriver path and resolve it again")
+    parser.add_argument('--block-resources', action='store_true',
+                        help="do not download stylesheets, fonts, images or trackers")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="send from this many browsers at once, each with its own profile and login")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
     try:
         # Uncomment the configuration you want to use:
         # For text messages:
         sender = WhatsAppSender(message_files=('message1.txt', 'message2.txt'),
-                                message_type="text", debug=True)
+                                message_type="text", debug=True,
+                                browser_pool=BrowserPool(size=args.workers), refresh_driver=args.refresh_driver,
+                                block_resources=args.block_resources)
         # For media messages (ensure media_path points to a valid file):
         # sender = WhatsAppSender(message_files=('message1.txt', 'message2.txt'),
-        #                         media_path="/path/to/your/image.jpg", message_type="media", debug=True)
+        #                         media_path="/path/to/your/image.jpg", message_type="media", debug=True,
+        #                         browser_pool=BrowserPool(size=args.workers), refresh_driver=args.refresh_driver,
+        #                         block_resources=args.block_resources)
         
         sender.init_driver()
         sender.wait_for_login()
-        sender.process_contacts('contacts.csv')
+        sender.process_contacts('contacts.csv', workers=args.workers)
     except Exception as e:
-        logging.critical(f"Main execution failed: {str(e)}")
+        log.critical("Main execution failed: %s", e)
         print(f"Critical error: {str(e)}")
     finally:
         sender.shutdown()